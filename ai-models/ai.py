@@ -7,9 +7,10 @@ import base64
 from PIL import Image
 import io
 import os
+import sys
 from datetime import datetime, timedelta
 import json
-from typing import List, Dict
+from typing import List, Dict, NamedTuple
 import sqlite3
 from sentence_transformers import SentenceTransformer
 import numpy as np
@@ -18,6 +19,7 @@ from bs4 import BeautifulSoup
 import threading
 import time
 from dotenv import load_dotenv
+from location_index import LocationResolver, load_centroids, snap_to_grid, cell_center
 
 # Add these imports at the top of your Flask app
 import speech_recognition as sr
@@ -174,6 +176,19 @@ def init_db():
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS advisory_cache (
+            question_index INTEGER,
+            location TEXT,
+            soil_type TEXT,
+            language TEXT,
+            response TEXT,
+            weather_summary TEXT,
+            signature TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (question_index, location, soil_type, language)
+        )
+    ''')
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS weather_cache (
             location TEXT PRIMARY KEY,
@@ -185,12 +200,53 @@ def init_db():
     conn.close()
 
 # Weather API integration
+WEATHER_CACHE_SECONDS = 30 * 60
+WEATHER_CACHE_MAX_CELLS = 5000
+
+# Forecasts per grid cell, oldest fetch first: cell -> (fetched_at, data)
+weather_cell_cache = {}
+weather_cell_cache_lock = threading.Lock()
+
+def cache_weather(cell, weather_data):
+    """Store a forecast for a grid cell, evicting expired and overflow entries"""
+    now = time.time()
+    with weather_cell_cache_lock:
+        # Re-insert so the dict stays ordered by fetch time
+        weather_cell_cache.pop(cell, None)
+        weather_cell_cache[cell] = (now, weather_data)
+        while weather_cell_cache:
+            oldest_cell, (fetched_at, _) = next(iter(weather_cell_cache.items()))
+            if now - fetched_at < WEATHER_CACHE_SECONDS and len(weather_cell_cache) <= WEATHER_CACHE_MAX_CELLS:
+                break
+            del weather_cell_cache[oldest_cell]
+
+def get_cached_weather_data(lat, lon):
+    """Return a fresh cached forecast for the grid cell without calling the API"""
+    cached = weather_cell_cache.get(snap_to_grid(lat, lon))
+    if cached and time.time() - cached[0] < WEATHER_CACHE_SECONDS:
+        return cached[1]
+    return None
+
+def describe_weather(weather_data):
+    """Short description of the current forecast entry"""
+    return weather_data["list"][0]["weather"][0]["description"] if weather_data else None
+
 def get_weather_data(lat, lon):
-    """Get weather data from OpenWeatherMap API"""
+    """Get weather data from OpenWeatherMap API, shared per grid cell"""
+    cached = get_cached_weather_data(lat, lon)
+    if cached:
+        return cached
+    
+    cell = snap_to_grid(lat, lon)
     try:
-        url = f"http://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={WEATHER_API_KEY}&units=metric"
+        center_lat, center_lon = cell_center(cell)
+        url = f"http://api.openweathermap.org/data/2.5/forecast?lat={center_lat}&lon={center_lon}&appid={WEATHER_API_KEY}&units=metric"
         response = requests.get(url, timeout=10)
-        return response.json() if response.status_code == 200 else None
+        if response.status_code != 200:
+            return None
+        weather_data = response.json()
+        cache_weather(cell, weather_data)
+        return weather_data
     except Exception as e:
         print(f"Weather API error: {e}")
         return None
@@ -203,13 +259,80 @@ LOCATION_COORDS = {
     "up": {"lat": 26.8467, "lon": 80.9462}
 }
 
+# Alternative location keys for the same knowledge-base region
+LOCATION_ALIASES = {"up": "uttar pradesh"}
+
+# Nearest-district lookup for arbitrary farm coordinates
+location_resolver = LocationResolver(load_centroids())
+
+def parse_coordinates(lat, lon):
+    """Return (lat, lon) as floats, or None if not given; raise ValueError if malformed"""
+    if lat in (None, "") or lon in (None, ""):
+        return None
+    lat, lon = float(lat), float(lon)
+    # Written so NaN fails the check too
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Coordinates out of range: {lat}, {lon}")
+    return lat, lon
+
+def resolve_location(location=None, lat=None, lon=None):
+    """Resolve a location name or raw farm coordinates to a knowledge-base region.
+    
+    Unknown names and coordinates outside the supported regions resolve with region None.
+    Raises ValueError for malformed coordinates.
+    """
+    coordinates = parse_coordinates(lat, lon)
+    if coordinates:
+        return location_resolver.resolve_coordinates(*coordinates)
+    
+    name = (location or "delhi").strip().lower()
+    if name in LOCATION_COORDS:
+        coords = LOCATION_COORDS[name]
+        return {"region": LOCATION_ALIASES.get(name, name), "district": None, "approximate": False,
+                "lat": coords["lat"], "lon": coords["lon"]}
+    
+    centroid = location_resolver.resolve_name(name)
+    if centroid:
+        return {"region": centroid["region"], "district": centroid["district"], "approximate": False,
+                "lat": centroid["lat"], "lon": centroid["lon"]}
+    
+    return {"region": None, "district": None, "approximate": False, "lat": None, "lon": None}
+
+# Retention policy for stored user_interaction rows
+INTERACTION_MAX_PER_LOCATION = 500
+INTERACTION_MAX_AGE_DAYS = 90
+INTERACTION_DUPLICATE_THRESHOLD = 0.95
+COMPACTION_INTERVAL_SECONDS = 6 * 60 * 60
+
+# Immutable view of the index published to readers
+class IndexSnapshot(NamedTuple):
+    items: List[Dict]
+    embeddings: np.ndarray
+    locations: np.ndarray
+    valid: np.ndarray
+    size: int
+
+INITIAL_INDEX_CAPACITY = 256
+
 # Enhanced RAG System with Agricultural Knowledge
 class RAGSystem:
     def __init__(self):
-        self.knowledge_base = []
+        self.last_compaction = None
+        self._lock = threading.Lock()
+        self._items = []
+        self._embeddings = None
+        self._locations = None
+        self._valid = None
+        self._snapshot = IndexSnapshot([], None, None, None, 0)
         self.load_knowledge_base()
         self.populate_agricultural_knowledge()
     
+    @property
+    def knowledge_base(self):
+        """Live items visible in the current snapshot"""
+        snapshot = self._snapshot
+        return [snapshot.items[idx] for idx in range(snapshot.size) if snapshot.valid[idx]]
+    
     def populate_agricultural_knowledge(self):
         """Populate knowledge base with comprehensive agricultural data"""
         for location, crops in AGRICULTURAL_KNOWLEDGE["crops"].items():
@@ -242,72 +365,309 @@ class RAGSystem:
         try:
             conn = sqlite3.connect('krishi_knowledge.db')
             cursor = conn.cursor()
-            cursor.execute("SELECT content, embedding, category, location FROM knowledge_base")
+            cursor.execute("SELECT id, content, embedding, category, location, timestamp FROM knowledge_base")
             rows = cursor.fetchall()
             
-            for row in rows:
-                content, embedding_blob, category, location = row
-                embedding = pickle.loads(embedding_blob) if embedding_blob else None
-                self.knowledge_base.append({
-                    "content": content,
-                    "embedding": embedding,
-                    "category": category,
-                    "location": location
-                })
+            with self._lock:
+                for row in rows:
+                    row_id, content, embedding_blob, category, location, timestamp = row
+                    embedding = pickle.loads(embedding_blob) if embedding_blob else None
+                    self._append({
+                        "id": row_id,
+                        "content": content,
+                        "embedding": embedding,
+                        "category": category,
+                        "location": location,
+                        "timestamp": timestamp
+                    })
+                self._publish()
             conn.close()
-            print(f"Loaded {len(self.knowledge_base)} items from knowledge base")
+            print(f"Loaded {self._snapshot.size} items from knowledge base")
         except sqlite3.OperationalError as e:
             print(f"Database error: {e}")
             print("Knowledge base will be empty initially")
         except Exception as e:
             print(f"Error loading knowledge base: {e}")
     
+    def _append(self, item):
+        """Write an item past the published size, doubling the buffers when full.
+        
+        Caller must hold self._lock and call _publish afterwards.
+        """
+        embedding = item["embedding"]
+        size = len(self._items)
+        
+        if self._embeddings is None:
+            if embedding is None:
+                dim = embedding_model.get_sentence_embedding_dimension()
+            else:
+                dim = len(embedding)
+            self._embeddings = np.zeros((INITIAL_INDEX_CAPACITY, dim), dtype=np.float32)
+            self._locations = np.empty(INITIAL_INDEX_CAPACITY, dtype=object)
+            self._valid = np.zeros(INITIAL_INDEX_CAPACITY, dtype=bool)
+        elif size == len(self._embeddings):
+            # Readers keep the old buffers alive through their snapshot
+            capacity = 2 * len(self._embeddings)
+            embeddings = np.zeros((capacity, self._embeddings.shape[1]), dtype=np.float32)
+            embeddings[:size] = self._embeddings[:size]
+            locations = np.empty(capacity, dtype=object)
+            locations[:size] = self._locations[:size]
+            valid = np.zeros(capacity, dtype=bool)
+            valid[:size] = self._valid[:size]
+            self._embeddings, self._locations, self._valid = embeddings, locations, valid
+        
+        if embedding is not None:
+            self._embeddings[size] = embedding
+        self._locations[size] = (item["location"] or "").lower()
+        self._valid[size] = embedding is not None
+        self._items.append(item)
+        return size
+    
+    def _publish(self):
+        """Expose everything appended so far to readers. Caller must hold self._lock."""
+        size = len(self._items)
+        if self._embeddings is None:
+            self._snapshot = IndexSnapshot([], None, None, None, 0)
+            return
+        embeddings = self._embeddings[:size]
+        embeddings.flags.writeable = False
+        locations = self._locations[:size]
+        locations.flags.writeable = False
+        # Writers retire entries in self._valid, so readers get their own copy
+        valid = self._valid[:size].copy()
+        valid.flags.writeable = False
+        self._snapshot = IndexSnapshot(self._items, embeddings, locations, valid, size)
+    
     def add_knowledge(self, content, category, location, language="en"):
         """Add new knowledge to the base"""
         try:
             embedding = embedding_model.encode(content)
+            timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
             
-            # Store in database
-            conn = sqlite3.connect('krishi_knowledge.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO knowledge_base (content, embedding, category, location, language)
-                VALUES (?, ?, ?, ?, ?)
-            """, (content, pickle.dumps(embedding), category, location, language))
-            conn.commit()
-            conn.close()
-            
-            # Add to memory
-            self.knowledge_base.append({
-                "content": content,
-                "embedding": embedding,
-                "category": category,
-                "location": location
-            })
+            with self._lock:
+                # Collapse near-identical interactions into the existing row
+                if category == "user_interaction":
+                    duplicate_idx = self._find_duplicate_interaction(embedding, location)
+                    if duplicate_idx is not None:
+                        self._refresh_interaction(duplicate_idx, content, embedding, language, timestamp)
+                        return
+                
+                # Store in database
+                conn = sqlite3.connect('krishi_knowledge.db')
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO knowledge_base (content, embedding, category, location, language, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (content, pickle.dumps(embedding), category, location, language, timestamp))
+                row_id = cursor.lastrowid
+                conn.commit()
+                conn.close()
+                
+                # Add to memory
+                self._append({
+                    "id": row_id,
+                    "content": content,
+                    "embedding": embedding,
+                    "category": category,
+                    "location": location,
+                    "timestamp": timestamp
+                })
+                self._publish()
         except Exception as e:
             print(f"Error adding knowledge: {e}")
     
-    def search_relevant_content(self, query, location, top_k=5):
+    def _find_duplicate_interaction(self, embedding, location):
+        """Return the index of a stored interaction nearly identical to this one"""
+        snapshot = self._snapshot
+        if not snapshot.size:
+            return None
+        
+        similarities = snapshot.embeddings @ np.asarray(embedding, dtype=np.float32)
+        candidates = np.flatnonzero((similarities >= INTERACTION_DUPLICATE_THRESHOLD)
+                                    & (snapshot.locations == location.lower())
+                                    & snapshot.valid[:snapshot.size])
+        for idx in candidates:
+            if snapshot.items[idx]["category"] == "user_interaction":
+                return int(idx)
+        return None
+    
+    def _refresh_interaction(self, idx, content, embedding, language, timestamp):
+        """Replace a duplicate interaction with the newer query/response pair"""
+        item = self._items[idx]
+        conn = sqlite3.connect('krishi_knowledge.db')
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE knowledge_base SET content = ?, embedding = ?, language = ?, timestamp = ?
+            WHERE id = ?
+        """, (content, pickle.dumps(embedding), language, timestamp, item["id"]))
+        row_id = item["id"]
+        if cursor.rowcount == 0:
+            # The row was removed by another process; store the interaction again
+            cursor.execute("""
+                INSERT INTO knowledge_base (content, embedding, category, location, language, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (content, pickle.dumps(embedding), item["category"], item["location"], language, timestamp))
+            row_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        
+        # Swap the old version for the new one in a single published snapshot
+        self._append(dict(item, id=row_id, content=content, embedding=embedding, timestamp=timestamp))
+        self._valid[idx] = False
+        self._publish()
+    
+    def _rank(self, query_embedding, location, snapshot, top_k):
+        """Rank snapshot items by similarity to the query embedding"""
+        if not snapshot.size:
+            return []
+        
+        scores = snapshot.embeddings @ np.asarray(query_embedding, dtype=np.float32)
+        # Boost location-specific content
+        scores = scores + 0.3 * (snapshot.locations == location.lower())
+        scores[~snapshot.valid[:snapshot.size]] = -np.inf
+        
+        if top_k < snapshot.size:
+            candidates = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            candidates = np.arange(snapshot.size)
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [snapshot.items[idx] for idx in candidates if np.isfinite(scores[idx])]
+    
+    def search_relevant_content(self, query, location, top_k=5, query_embedding=None):
         """Search for relevant content using similarity"""
-        if not self.knowledge_base:
+        snapshot = self._snapshot
+        if not snapshot.size:
             return []
         
         try:
-            query_embedding = embedding_model.encode(query)
-            similarities = []
-            
-            for idx, item in enumerate(self.knowledge_base):
-                if item["embedding"] is not None:
-                    # Boost location-specific content
-                    location_boost = 0.3 if item["location"].lower() == location.lower() else 0
-                    similarity = np.dot(query_embedding, item["embedding"]) + location_boost
-                    similarities.append((similarity, idx))
-            
-            similarities.sort(reverse=True)
-            return [self.knowledge_base[idx] for _, idx in similarities[:top_k]]
+            if query_embedding is None:
+                query_embedding = embedding_model.encode(query)
+            return self._rank(query_embedding, location, snapshot, top_k)
         except Exception as e:
             print(f"Error searching relevant content: {e}")
             return []
+    
+    def _select_dropped_interactions(self, snapshot):
+        """Return snapshot indices to drop under the interaction retention policy"""
+        cutoff = (datetime.utcnow() - timedelta(days=INTERACTION_MAX_AGE_DAYS)).strftime("%Y-%m-%d %H:%M:%S")
+        by_location = {}
+        drop = set()
+        
+        for idx in range(snapshot.size):
+            item = snapshot.items[idx]
+            if item["category"] != "user_interaction" or not snapshot.valid[idx]:
+                continue
+            if not item.get("timestamp") or item["timestamp"] < cutoff:
+                drop.add(idx)
+                continue
+            by_location.setdefault(snapshot.locations[idx], []).append(idx)
+        
+        for indices in by_location.values():
+            # Newest first, so the most recent answer survives a collapse
+            indices.sort(key=lambda i: snapshot.items[i]["timestamp"], reverse=True)
+            kept = []
+            for idx in indices:
+                if len(kept) >= INTERACTION_MAX_PER_LOCATION or (kept and np.max(
+                        snapshot.embeddings[kept] @ snapshot.embeddings[idx]) >= INTERACTION_DUPLICATE_THRESHOLD):
+                    drop.add(idx)
+                else:
+                    kept.append(idx)
+        
+        return drop
+    
+    def _memory_bytes(self, snapshot):
+        """Approximate bytes held by the allocated index buffers and item payloads"""
+        total = 0
+        for buffer in (self._embeddings, self._locations, self._valid):
+            if buffer is not None:
+                total += buffer.nbytes
+        for idx in range(snapshot.size):
+            item = snapshot.items[idx]
+            total += sys.getsizeof(item) + sys.getsizeof(item["content"])
+            if item["embedding"] is not None:
+                total += item["embedding"].nbytes
+        return total
+    
+    def _measure(self, snapshot, samples=20):
+        """Return item count, memory bytes and mean search latency in ms"""
+        live = np.flatnonzero(snapshot.valid[:snapshot.size]) if snapshot.size else []
+        if not len(live):
+            return {"items": 0, "memory_bytes": self._memory_bytes(snapshot), "search_ms": 0.0}
+        
+        query_embedding = snapshot.embeddings[live[0]]
+        start = time.perf_counter()
+        for _ in range(samples):
+            self._rank(query_embedding, "delhi", snapshot, 3)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / samples
+        
+        return {
+            "items": len(live),
+            "memory_bytes": self._memory_bytes(snapshot),
+            "search_ms": round(elapsed_ms, 3)
+        }
+    
+    def compact_interactions(self):
+        """Apply the retention policy to user_interaction rows in the database and in memory"""
+        try:
+            snapshot = self._snapshot
+            before = self._measure(snapshot)
+            drop = self._select_dropped_interactions(snapshot)
+            
+            with self._lock:
+                # Keep everything written since the snapshot, minus retired entries
+                items = self._items
+                valid = self._valid
+                keep = [idx for idx in range(len(items)) if valid[idx] and idx not in drop]
+                keep_ids = {items[idx]["id"] for idx in keep}
+                # A refreshed interaction shares its row id with the retired copy
+                drop_ids = {items[idx]["id"] for idx in drop} - keep_ids
+                
+                if drop_ids:
+                    conn = sqlite3.connect('krishi_knowledge.db')
+                    cursor = conn.cursor()
+                    cursor.executemany("DELETE FROM knowledge_base WHERE id = ?",
+                                       [(row_id,) for row_id in drop_ids])
+                    conn.commit()
+                    conn.close()
+                
+                if len(keep) < len(items):
+                    # Rebuild into fresh buffers; readers keep using the old snapshot until published
+                    self._items = []
+                    self._embeddings = None
+                    for idx in keep:
+                        self._append(items[idx])
+                    self._publish()
+            
+            if drop_ids:
+                # Rewrite the table file to reclaim space outside the writer lock
+                conn = sqlite3.connect('krishi_knowledge.db')
+                conn.execute("VACUUM")
+                conn.close()
+            
+            after = self._measure(self._snapshot)
+            self.last_compaction = {
+                "removed": len(drop_ids),
+                "before": before,
+                "after": after,
+                "timestamp": datetime.now().isoformat()
+            }
+            print(f"Compaction removed {len(drop_ids)} interactions: "
+                  f"{before['items']} -> {after['items']} items, "
+                  f"{before['memory_bytes']} -> {after['memory_bytes']} bytes in memory, "
+                  f"{before['search_ms']} -> {after['search_ms']} ms per search")
+        except Exception as e:
+            print(f"Error compacting knowledge base: {e}")
+
+def start_compaction_scheduler(rag, interval=COMPACTION_INTERVAL_SECONDS):
+    """Run knowledge base compaction periodically in a background thread"""
+    def run():
+        while True:
+            rag.compact_interactions()
+            time.sleep(interval)
+    
+    thread = threading.Thread(target=run, name="kb-compaction", daemon=True)
+    thread.start()
+    return thread
 
 def get_season_specific_guidance(location):
     """Get current season specific agricultural guidance"""
@@ -372,14 +732,216 @@ DEFAULT_QUESTIONS = {
     ]
 }
 
+def generate_advisory(english_query, location, soil_type, weather_data, query_embedding=None):
+    """Generate an English advisory for a query using RAG, season and weather context"""
+    # Search relevant content from RAG
+    relevant_content = rag_system.search_relevant_content(english_query, location, top_k=3,
+                                                          query_embedding=query_embedding)
+    
+    # Get season-specific guidance
+    season_guidance = get_season_specific_guidance(location)
+    
+    # Prepare comprehensive context for Gemini
+    context = f"""
+    You are an expert agricultural advisor specializing in Indian farming practices. Provide specific, actionable advice based on the following information:
+    
+    LOCATION: {location.title()}, India
+    SOIL TYPE: {soil_type.title()}
+    USER QUERY: {english_query}
+    
+    CURRENT AGRICULTURAL CONTEXT:
+    {season_guidance}
+    
+    RELEVANT AGRICULTURAL KNOWLEDGE:
+    {chr(10).join([item['content'] for item in relevant_content])}
+    
+    CURRENT WEATHER CONTEXT:
+    {f"Temperature: {weather_data['list'][0]['main']['temp']}°C, Condition: {weather_data['list'][0]['weather'][0]['description']}, Humidity: {weather_data['list'][0]['main']['humidity']}%" if weather_data else "Weather data unavailable"}
+    
+    INSTRUCTIONS FOR YOUR RESPONSE:
+    1. Address the farmer's specific question directly
+    2. Provide location-specific recommendations for {location.title()}
+    3. Consider the {soil_type} soil type in your advice
+    4. Include specific quantities for fertilizers/pesticides when relevant
+    5. Mention timing based on current season (September 2025)
+    6. Give practical, implementable steps
+    7. Include cost-effective solutions
+    8. Mention any weather-related precautions if applicable
+    
+    Please structure your response with:
+    - Direct answer to the question
+    - Specific recommendations with quantities
+    - Timing advice
+    - Best practices
+    - Precautions/warnings if any
+    
+    Keep the response practical and farmer-friendly, avoiding overly technical language.
+    """
+    
+    # Generate response using Gemini
+    response = model.generate_content(context)
+    return response.text
+
+# Precomputed answers for DEFAULT_QUESTIONS
+ADVISORY_REFRESH_SECONDS = 30 * 60
+ADVISORY_TEMP_STEP = 5  # °C band; smaller swings don't change the advice
+ADVISORY_FORECAST_STEPS = 8  # 3-hourly entries, so the next 24 hours
+ADVISORY_SOIL_TYPES = list(AGRICULTURAL_KNOWLEDGE["soil_management"].keys())
+ADVISORY_REGIONS = list(AGRICULTURAL_KNOWLEDGE["crops"].keys())
+
+class AdvisoryStore:
+    def __init__(self):
+        self.advisories = {}
+        self.question_lookup = {
+            question.strip().lower(): (lang, idx)
+            for lang, questions in DEFAULT_QUESTIONS.items()
+            for idx, question in enumerate(questions)
+        }
+        self.question_embeddings = embedding_model.encode(DEFAULT_QUESTIONS["en"])
+        self.load_advisories()
+    
+    def load_advisories(self):
+        """Load precomputed advisories from database"""
+        try:
+            conn = sqlite3.connect('krishi_knowledge.db')
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT question_index, location, soil_type, language, response, weather_summary, signature
+                FROM advisory_cache
+            """)
+            for question_index, location, soil_type, language, response, weather_summary, signature in cursor.fetchall():
+                self.advisories[(question_index, location, soil_type, language)] = {
+                    "response": response,
+                    "weather_summary": weather_summary,
+                    "signature": signature
+                }
+            conn.close()
+            print(f"Loaded {len(self.advisories)} precomputed advisories")
+        except Exception as e:
+            print(f"Error loading precomputed advisories: {e}")
+    
+    def match_question(self, query):
+        """Return (language, index) if the query is one of the default questions"""
+        return self.question_lookup.get(query.strip().lower())
+    
+    def get(self, question_index, location, soil_type, language):
+        """Return the stored advisory for a default question, if any"""
+        region = LOCATION_ALIASES.get(location, location)
+        return self.advisories.get((question_index, region, soil_type, language))
+    
+    def weather_signature(self, location, weather_data):
+        """Summarise the conditions an advisory depends on"""
+        season = get_season_specific_guidance(location)
+        if not weather_data:
+            return f"{season}|unavailable"
+        # Aggregate over the next day so day/night swings don't invalidate the answers
+        forecast = weather_data["list"][:ADVISORY_FORECAST_STEPS]
+        conditions = [entry["weather"][0]["main"] for entry in forecast]
+        dominant = max(set(conditions), key=lambda c: (conditions.count(c), c))
+        max_band = int(max(entry["main"].get("temp_max", entry["main"]["temp"]) for entry in forecast)
+                       // ADVISORY_TEMP_STEP)
+        return f"{season}|{dominant}|{max_band}"
+    
+    def refresh(self):
+        """Fill in advisories that are missing or stale for the current season and weather"""
+        for region in ADVISORY_REGIONS:
+            try:
+                coords = LOCATION_COORDS[region]
+                weather_data = get_weather_data(coords["lat"], coords["lon"])
+                # Keep weather-aware answers rather than replacing them with weather-less ones
+                if not weather_data and any(key[1] == region for key in self.advisories):
+                    continue
+                self.refresh_location(region, weather_data, self.weather_signature(region, weather_data))
+            except Exception as e:
+                print(f"Error precomputing advisories for {region}: {e}")
+    
+    def _translate(self, text, language):
+        """Translate an advisory, returning None on failure so the next refresh retries it"""
+        if language == "en":
+            return text
+        try:
+            return translator.translate(text, dest=language).text
+        except Exception as e:
+            print(f"Advisory translation error ({language}): {e}")
+            return None
+    
+    def refresh_location(self, location, weather_data, signature):
+        """Generate every default question × soil type × language answer not yet current for a location"""
+        weather_summary = weather_data["list"][0]["weather"][0]["description"] if weather_data else None
+        rows = []
+        
+        for question_index, english_query in enumerate(DEFAULT_QUESTIONS["en"]):
+            for soil_type in ADVISORY_SOIL_TYPES:
+                stale = [language for language in DEFAULT_QUESTIONS
+                         if (self.get(question_index, location, soil_type, language) or {}).get("signature") != signature]
+                if not stale:
+                    continue
+                
+                # A current English answer only needs translating; otherwise ask Gemini again
+                english = self.get(question_index, location, soil_type, "en")
+                if english and english["signature"] == signature:
+                    ai_response = english["response"]
+                else:
+                    ai_response = generate_advisory(english_query, location, soil_type, weather_data,
+                                                    self.question_embeddings[question_index])
+                
+                for language in stale:
+                    response = self._translate(ai_response, language)
+                    if response is None:
+                        continue
+                    # Single dict assignments, so concurrent lookups see old or new answers
+                    self.advisories[(question_index, location, soil_type, language)] = {
+                        "response": response,
+                        "weather_summary": weather_summary,
+                        "signature": signature
+                    }
+                    rows.append((question_index, location, soil_type, language, response, weather_summary, signature))
+        
+        if not rows:
+            return
+        
+        conn = sqlite3.connect('krishi_knowledge.db')
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO advisory_cache
+            (question_index, location, soil_type, language, response, weather_summary, signature)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        conn.close()
+        
+        print(f"Precomputed {len(rows)} advisories for {location.title()}")
+
+def start_advisory_scheduler(store, interval=ADVISORY_REFRESH_SECONDS):
+    """Refresh precomputed advisories periodically in a background thread"""
+    def run():
+        while True:
+            store.refresh()
+            time.sleep(interval)
+    
+    thread = threading.Thread(target=run, name="advisory-refresh", daemon=True)
+    thread.start()
+    return thread
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     try:
         data = request.json
         user_query = data.get('query', '')
-        location = data.get('location', 'delhi').lower()
-        soil_type = data.get('soilType', 'loamy')
+        try:
+            resolved = resolve_location(data.get('location', 'delhi'), data.get('lat'), data.get('lon'))
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid lat/lon"}), 400
+        if resolved["region"] is None:
+            return jsonify({"success": False, "error": "Location is unknown or outside the supported regions"}), 400
+        location = resolved["region"]
+        soil_type = data.get('soilType', 'loamy').lower()
         user_lang = data.get('language', 'auto')
+        if resolved["district"]:
+            district = f"near {resolved['district']}" if resolved["approximate"] else resolved["district"]
+            location_label = f"{district}, {location.title()}"
+        else:
+            location_label = location.title()
         
         if not user_query:
             return jsonify({"success": False, "error": "Query is required"})
@@ -391,61 +953,41 @@ def chat():
                 "error": "Gemini API key not configured."
             })
         
-        # Detect and translate query
-        english_query, detected_lang = detect_and_translate(user_query, "en")
-        if user_lang == 'auto':
-            user_lang = detected_lang
-        
-        # Get weather data
-        coords = LOCATION_COORDS.get(location, LOCATION_COORDS["delhi"])
-        weather_data = get_weather_data(coords["lat"], coords["lon"])
-        
-        # Search relevant content from RAG
-        relevant_content = rag_system.search_relevant_content(english_query, location, top_k=3)
-        
-        # Get season-specific guidance
-        season_guidance = get_season_specific_guidance(location)
+        # Default question buttons are answered from the precomputed store
+        match = advisory_store.match_question(user_query) if 'advisory_store' in globals() else None
+        if match:
+            detected_lang, question_index = match
+            if user_lang == 'auto':
+                user_lang = detected_lang
+            
+            advisory = advisory_store.get(question_index, location, soil_type, user_lang)
+            if advisory:
+                # Serve the region answer without waiting on this farm's forecast;
+                # only report weather already fetched for the farm's own cell
+                return jsonify({
+                    "success": True,
+                    "response": advisory["response"],
+                    "detected_language": detected_lang,
+                    "weather_summary": describe_weather(get_cached_weather_data(resolved["lat"], resolved["lon"])),
+                    "location_context": f"{location_label}, {soil_type} soil",
+                    "precomputed": True
+                })
+            
+            # On a store miss, skip translation and query embedding
+            english_query = DEFAULT_QUESTIONS["en"][question_index]
+            query_embedding = advisory_store.question_embeddings[question_index]
+        else:
+            # Detect and translate query
+            english_query, detected_lang = detect_and_translate(user_query, "en")
+            query_embedding = None
+            if user_lang == 'auto':
+                user_lang = detected_lang
         
-        # Prepare comprehensive context for Gemini
-        context = f"""
-        You are an expert agricultural advisor specializing in Indian farming practices. Provide specific, actionable advice based on the following information:
-
-        LOCATION: {location.title()}, India
-        SOIL TYPE: {soil_type.title()}
-        USER QUERY: {english_query}
-        
-        CURRENT AGRICULTURAL CONTEXT:
-        {season_guidance}
-        
-        RELEVANT AGRICULTURAL KNOWLEDGE:
-        {chr(10).join([item['content'] for item in relevant_content])}
-        
-        CURRENT WEATHER CONTEXT:
-        {f"Temperature: {weather_data['list'][0]['main']['temp']}°C, Condition: {weather_data['list'][0]['weather'][0]['description']}, Humidity: {weather_data['list'][0]['main']['humidity']}%" if weather_data else "Weather data unavailable"}
-        
-        INSTRUCTIONS FOR YOUR RESPONSE:
-        1. Address the farmer's specific question directly
-        2. Provide location-specific recommendations for {location.title()}
-        3. Consider the {soil_type} soil type in your advice
-        4. Include specific quantities for fertilizers/pesticides when relevant
-        5. Mention timing based on current season (September 2025)
-        6. Give practical, implementable steps
-        7. Include cost-effective solutions
-        8. Mention any weather-related precautions if applicable
-        
-        Please structure your response with:
-        - Direct answer to the question
-        - Specific recommendations with quantities
-        - Timing advice
-        - Best practices
-        - Precautions/warnings if any
-        
-        Keep the response practical and farmer-friendly, avoiding overly technical language.
-        """
+        # Get weather data for the farm's grid cell
+        weather_data = get_weather_data(resolved["lat"], resolved["lon"])
         
         # Generate response using Gemini
-        response = model.generate_content(context)
-        ai_response = response.text
+        ai_response = generate_advisory(english_query, location, soil_type, weather_data, query_embedding)
         
         # Translate response back to user's language
         final_response = translate_response(ai_response, user_lang)
@@ -462,8 +1004,8 @@ def chat():
             "success": True,
             "response": final_response,
             "detected_language": detected_lang,
-            "weather_summary": weather_data["list"][0]["weather"][0]["description"] if weather_data else None,
-            "location_context": f"{location.title()}, {soil_type} soil"
+            "weather_summary": describe_weather(weather_data),
+            "location_context": f"{location_label}, {soil_type} soil"
         })
         
     except Exception as e:
@@ -564,9 +1106,14 @@ def get_default_questions():
 
 @app.route('/api/weather', methods=['GET'])
 def get_weather():
-    location = request.args.get('location', 'delhi')
-    coords = LOCATION_COORDS.get(location, LOCATION_COORDS["delhi"])
-    weather_data = get_weather_data(coords["lat"], coords["lon"])
+    try:
+        resolved = resolve_location(request.args.get('location', 'delhi'),
+                                    request.args.get('lat'), request.args.get('lon'))
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid lat/lon"}), 400
+    if resolved["lat"] is None:
+        return jsonify({"success": False, "error": "Unknown location"}), 400
+    weather_data = get_weather_data(resolved["lat"], resolved["lon"])
     
     if weather_data:
         return jsonify({"success": True, "weather": weather_data})
@@ -696,6 +1243,8 @@ def health_check():
         "gemini_api": bool(GEMINI_API_KEY),
         "weather_api": bool(WEATHER_API_KEY),
         "knowledge_base_items": len(rag_system.knowledge_base) if 'rag_system' in globals() else 0,
+        "last_compaction": rag_system.last_compaction if 'rag_system' in globals() else None,
+        "precomputed_advisories": len(advisory_store.advisories) if 'advisory_store' in globals() else 0,
         "timestamp": datetime.now().isoformat()
     })
 
@@ -722,6 +1271,24 @@ if __name__ == '__main__':
     rag_system = RAGSystem()
     
     print(f"✅ Knowledge base populated with {len(rag_system.knowledge_base)} agricultural guidance items")
+    
+    debug = True
+    use_reloader = debug
+    
+    # The reloader re-runs this block in a child process that serves requests;
+    # only start background jobs there so one process owns the database rows
+    run_background_jobs = not use_reloader or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+    
+    # Keep stored user interactions bounded
+    if run_background_jobs:
+        start_compaction_scheduler(rag_system)
+    
+    # Precompute answers for the default question buttons
+    print("Loading precomputed advisories for default questions...")
+    advisory_store = AdvisoryStore()
+    if run_background_jobs:
+        start_advisory_scheduler(advisory_store)
+    
     print("🌾 Krishi AI Backend ready with comprehensive farming knowledge!")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=debug, use_reloader=use_reloader)
 
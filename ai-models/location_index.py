@@ -0,0 +1,213 @@
+import csv
+import math
+import os
+import time
+
+import numpy as np
+
+CENTROIDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'district_centroids.csv')
+
+# Grid used to share weather lookups between nearby farms (~28 km cells)
+GRID_CELL_DEGREES = 0.25
+
+# Longitude scale so squared-degree distances are roughly isotropic over North India
+LON_SCALE = math.cos(math.radians(28))
+KM_PER_DEGREE = 111.2
+
+# Farms further than this from every district centroid are outside the supported regions.
+# Large districts such as Sonbhadra reach ~75 km from their headquarters.
+MAX_CENTROID_DISTANCE_KM = 80
+
+# Towns that are not district headquarters, with the district and state they belong to.
+# Nearest headquarters only approximates district boundaries, so near a border the
+# resolved district can be a neighbour; the state must always match.
+CHECK_POINTS = [
+    ("Khurja", 28.25, 77.85, "Bulandshahr", "uttar pradesh"),
+    ("Modinagar", 28.83, 77.58, "Ghaziabad", "uttar pradesh"),
+    ("Shikohabad", 27.10, 78.58, "Firozabad", "uttar pradesh"),
+    ("Mau Ranipur", 25.24, 79.13, "Jhansi", "uttar pradesh"),
+    ("Chunar", 25.13, 82.88, "Mirzapur", "uttar pradesh"),
+    ("Tanda", 26.55, 82.65, "Ambedkar Nagar", "uttar pradesh"),
+    ("Nanpara", 27.87, 81.50, "Bahraich", "uttar pradesh"),
+    ("Gola Gokarannath", 28.08, 80.47, "Lakhimpur Kheri", "uttar pradesh"),
+    ("Dudhi", 24.21, 83.24, "Sonbhadra", "uttar pradesh"),
+    ("Talbehat", 25.04, 78.43, "Lalitpur", "uttar pradesh"),
+    ("Mahmudabad", 27.30, 81.12, "Sitapur", "uttar pradesh"),
+    ("Kairana", 29.39, 77.20, "Shamli", "uttar pradesh"),
+    ("Nagina", 29.44, 78.43, "Bijnor", "uttar pradesh"),
+    ("Sikandra Rao", 27.69, 78.38, "Hathras", "uttar pradesh"),
+    ("Bindki", 26.04, 80.57, "Fatehpur", "uttar pradesh"),
+    ("Phagwara", 31.22, 75.77, "Kapurthala", "punjab"),
+    ("Rajpura", 30.48, 76.59, "Patiala", "punjab"),
+    ("Abohar", 30.14, 74.20, "Fazilka", "punjab"),
+    ("Khanna", 30.70, 76.22, "Ludhiana", "punjab"),
+    ("Batala", 31.82, 75.20, "Gurdaspur", "punjab"),
+    ("Zira", 30.97, 74.99, "Firozpur", "punjab"),
+    ("Mukerian", 31.95, 75.62, "Hoshiarpur", "punjab"),
+    ("Sunam", 30.13, 75.80, "Sangrur", "punjab"),
+    ("Budhlada", 29.93, 75.56, "Mansa", "punjab"),
+    ("Narela", 28.85, 77.09, None, "delhi"),
+    ("Najafgarh", 28.61, 76.98, "South West Delhi", "delhi"),
+]
+
+def load_centroids(path=CENTROIDS_PATH):
+    """Load district centroids as a list of dicts"""
+    centroids = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            centroids.append({
+                "district": row["district"],
+                "region": row["state"],
+                "lat": float(row["lat"]),
+                "lon": float(row["lon"])
+            })
+    return centroids
+
+def snap_to_grid(lat, lon, cell_degrees=GRID_CELL_DEGREES):
+    """Return the grid cell containing a coordinate"""
+    return (math.floor(lat / cell_degrees), math.floor(lon / cell_degrees))
+
+def cell_center(cell, cell_degrees=GRID_CELL_DEGREES):
+    """Return the (lat, lon) centre of a grid cell"""
+    return ((cell[0] + 0.5) * cell_degrees, (cell[1] + 0.5) * cell_degrees)
+
+class KDTree:
+    """Two-dimensional KD-tree for nearest-centroid queries"""
+
+    def __init__(self, points):
+        self.points = [(float(x), float(y)) for x, y in points]
+        self.nodes = []
+        self.root = self._build(list(range(len(self.points))), 0)
+
+    def _build(self, indices, depth):
+        if not indices:
+            return -1
+        axis = depth % 2
+        indices.sort(key=lambda i: self.points[i][axis])
+        mid = len(indices) // 2
+
+        node = len(self.nodes)
+        self.nodes.append(None)
+        left = self._build(indices[:mid], depth + 1)
+        right = self._build(indices[mid + 1:], depth + 1)
+        self.nodes[node] = (indices[mid], axis, left, right)
+        return node
+
+    def nearest(self, x, y):
+        """Return (index, squared distance) of the point nearest to (x, y)"""
+        best_idx, best_dist = -1, math.inf
+        stack = [(self.root, 0.0)]
+
+        while stack:
+            node, bound = stack.pop()
+            if node == -1 or bound >= best_dist:
+                continue
+            idx, axis, left, right = self.nodes[node]
+            px, py = self.points[idx]
+            dist = (px - x) ** 2 + (py - y) ** 2
+            if dist < best_dist:
+                best_idx, best_dist = idx, dist
+
+            diff = (x - px) if axis == 0 else (y - py)
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Far side is only worth visiting if the splitting plane is closer than the best match
+            stack.append((far, diff * diff))
+            stack.append((near, 0.0))
+
+        return best_idx, best_dist
+
+class LocationResolver:
+    """Resolve farm coordinates or place names to the nearest district"""
+
+    def __init__(self, centroids, cell_degrees=GRID_CELL_DEGREES, max_distance_km=MAX_CENTROID_DISTANCE_KM):
+        self.centroids = centroids
+        self.cell_degrees = cell_degrees
+        self.max_distance_sq = (max_distance_km / KM_PER_DEGREE) ** 2
+        self.by_name = {c["district"].lower(): c for c in centroids}
+        self.tree = KDTree([(c["lon"] * LON_SCALE, c["lat"]) for c in centroids])
+
+    def nearest(self, lat, lon):
+        """Return the centroid nearest to a coordinate, or None if it is beyond the cutoff"""
+        idx, dist = self.tree.nearest(lon * LON_SCALE, lat)
+        if dist > self.max_distance_sq:
+            return None
+        return self.centroids[idx]
+
+    def resolve_name(self, name):
+        """Return the centroid for a district name, if known"""
+        return self.by_name.get(name.strip().lower())
+
+    def resolve_coordinates(self, lat, lon):
+        """Resolve a farm's own coordinate to its district; the grid cell is only a cache key.
+
+        The district is the nearest headquarters, so it is marked approximate.
+        Points outside the supported regions get None for region and district.
+        """
+        centroid = self.nearest(lat, lon)
+        return {
+            "region": centroid["region"] if centroid else None,
+            "district": centroid["district"] if centroid else None,
+            "approximate": True,
+            "lat": lat,
+            "lon": lon,
+            "cell": snap_to_grid(lat, lon, self.cell_degrees)
+        }
+
+def check(check_points=CHECK_POINTS):
+    """Compare KD-tree resolution with brute force and the known state of each check point"""
+    centroids = load_centroids()
+    resolver = LocationResolver(centroids)
+    failures = []
+    neighbours = []
+
+    for town, lat, lon, district, region in check_points:
+        resolved = resolver.resolve_coordinates(lat, lon)
+        # Brute force over every centroid with the same projection and cutoff
+        dist, nearest = min((((c["lon"] - lon) * LON_SCALE) ** 2 + (c["lat"] - lat) ** 2, i)
+                            for i, c in enumerate(centroids))
+        expected = centroids[nearest]["district"] if dist <= resolver.max_distance_sq else None
+
+        if resolved["district"] != expected:
+            failures.append(f"{town}: KD-tree {resolved['district']}, brute force {expected}")
+        if resolved["region"] != region:
+            failures.append(f"{town}: region {resolved['region']}, expected {region}")
+        if district and resolved["district"] != district:
+            neighbours.append(f"{town}: nearest headquarters {resolved['district']}, district {district}")
+
+    print(f"Checked {len(check_points)} towns: {len(failures)} failures, "
+          f"{len(neighbours)} resolved to a neighbouring district")
+    for line in failures + neighbours:
+        print(f"  {line}")
+    return not failures
+
+def benchmark(num_points=1_000_000, seed=42):
+    """Time coordinate resolution and compare cache reuse on synthetic farm points"""
+    centroids = load_centroids()
+    resolver = LocationResolver(centroids)
+
+    # Farms scattered around randomly chosen district centroids
+    rng = np.random.default_rng(seed)
+    anchors = rng.integers(len(centroids), size=num_points)
+    lats = np.array([c["lat"] for c in centroids])[anchors] + rng.normal(0, 0.3, num_points)
+    lons = np.array([c["lon"] for c in centroids])[anchors] + rng.normal(0, 0.3, num_points)
+    points = list(zip(lats.tolist(), lons.tolist()))
+
+    start = time.perf_counter()
+    resolved = [resolver.resolve_coordinates(lat, lon) for lat, lon in points]
+    resolve_us = (time.perf_counter() - start) * 1e6 / num_points
+    unsupported = sum(1 for r in resolved if r["region"] is None)
+
+    # A shared cache misses once per distinct key
+    raw_keys = len(set(points))
+    cell_keys = len({snap_to_grid(lat, lon) for lat, lon in points})
+
+    print(f"{num_points} farm points, {len(centroids)} district centroids")
+    print(f"Nearest-district resolution: {resolve_us:.2f} us/point")
+    print(f"Beyond {MAX_CENTROID_DISTANCE_KM} km of every centroid: {unsupported} points")
+    print(f"Cache hit rate keyed by raw lat/lon: {1 - raw_keys / num_points:.2%} ({raw_keys} entries)")
+    print(f"Cache hit rate keyed by grid cell:   {1 - cell_keys / num_points:.2%} ({cell_keys} entries)")
+
+if __name__ == '__main__':
+    checks_passed = check()
+    benchmark()
+    raise SystemExit(0 if checks_passed else 1)
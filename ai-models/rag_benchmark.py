@@ -0,0 +1,103 @@
+"""Concurrency stress test and insert-while-search benchmark for RAGSystem.
+
+Needs the web dependencies from requirements.txt for `import ai`; the
+sentence-transformers model is replaced by StubEncoder and never loaded.
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import types
+
+import numpy as np
+
+class StubEncoder:
+    """Deterministic unit vectors so runs are repeatable and skip the real model"""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, text):
+        seed = int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+# Install the stub before ai.py builds its embedding model
+stub_module = types.ModuleType("sentence_transformers")
+stub_module.SentenceTransformer = lambda *args, **kwargs: StubEncoder()
+sys.modules["sentence_transformers"] = stub_module
+
+# ai.py refuses to import without keys; nothing here calls the remote APIs
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("WEATHER_API_KEY", "benchmark")
+
+import ai
+
+def stress(readers=4, writers=4, inserts_per_writer=500, top_k=50):
+    """Search from several threads while others insert and refresh interactions"""
+    rag = ai.RAGSystem()
+    errors = []
+    searches = [0] * readers
+    stop = threading.Event()
+
+    def read(slot):
+        while not stop.is_set():
+            try:
+                results = rag.search_relevant_content("wheat fertilizer", "punjab", top_k=top_k)
+                ids = [item["id"] for item in results]
+                assert results, "empty search results"
+                # A refreshed interaction must never appear twice in one snapshot
+                assert len(ids) == len(set(ids)), "duplicate ids in search results"
+                searches[slot] += 1
+            except Exception as e:
+                errors.append(e)
+
+    def write(worker):
+        for i in range(inserts_per_writer):
+            # Every third insert repeats an earlier query, exercising the refresh path
+            n = i - 1 if i % 3 == 2 else i
+            rag.add_knowledge(f"Location: punjab, Query: {worker}-{n}", "user_interaction", "punjab", "en")
+
+    reader_threads = [threading.Thread(target=read, args=(slot,)) for slot in range(readers)]
+    for thread in reader_threads:
+        thread.start()
+
+    time.sleep(1.0)
+    idle = sum(searches)
+    idle_rate = idle / 1.0
+
+    start = time.perf_counter()
+    writer_threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    busy_rate = (sum(searches) - idle) / elapsed
+
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+
+    memory_ids = sorted(item["id"] for item in rag.knowledge_base)
+    conn = sqlite3.connect('krishi_knowledge.db')
+    db_ids = sorted(row[0] for row in conn.execute("SELECT id FROM knowledge_base"))
+    conn.close()
+
+    print(f"{readers} readers, {writers} writers x {inserts_per_writer} inserts in {elapsed:.2f}s")
+    print(f"Reader errors: {len(errors)}{f' (first: {errors[0]!r})' if errors else ''}")
+    print(f"In-memory ids match database: {memory_ids == db_ids} ({len(memory_ids)} rows)")
+    print(f"Search throughput idle: {idle_rate:.0f}/s, during inserts: {busy_rate:.0f}/s")
+    return not errors and memory_ids == db_ids
+
+if __name__ == '__main__':
+    # Run against a scratch database so the real knowledge base is untouched
+    os.chdir(tempfile.mkdtemp(prefix="krishi-bench-"))
+    ai.init_db()
+    raise SystemExit(0 if stress() else 1)